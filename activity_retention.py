@@ -0,0 +1,355 @@
+"""
+ActivityLog Retention for Mini Trello Flask App
+Moves old activity rows into compressed per-board, per-month NDJSON archives,
+keeps daily per-board rollup counts and reads the archive back when
+the activity feed pages past the live window.
+"""
+
+import os
+import gzip
+import json
+import uuid
+import zlib
+import tempfile
+from collections import Counter
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from sqlalchemy import func
+
+from app import db
+from swagger_ui import get_project_root
+
+DEFAULT_RETENTION_DAYS = 90
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_ARCHIVE_DIR = os.path.join('archive', 'activities')
+SEGMENT_SUFFIX = '.ndjson.gz'
+
+
+class ActivityDailyRollup(db.Model):
+    """Per-board, per-day, per-action count of archived activity rows."""
+    __tablename__ = 'activity_daily_rollups'
+    __table_args__ = (
+        db.UniqueConstraint('board_id', 'day', 'action', name='uq_activity_rollup'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    board_id = db.Column(db.Integer, nullable=False, index=True)
+    day = db.Column(db.Date, nullable=False)
+    action = db.Column(db.String(100), nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
+def _retention_days():
+    return int(current_app.config.get('ACTIVITY_RETENTION_DAYS',
+                                      os.environ.get('ACTIVITY_RETENTION_DAYS', DEFAULT_RETENTION_DAYS)))
+
+
+def _batch_size():
+    return int(current_app.config.get('ACTIVITY_ARCHIVE_BATCH_SIZE',
+                                      os.environ.get('ACTIVITY_ARCHIVE_BATCH_SIZE', DEFAULT_BATCH_SIZE)))
+
+
+def _archive_dir():
+    archive_dir = current_app.config.get('ACTIVITY_ARCHIVE_DIR',
+                                         os.environ.get('ACTIVITY_ARCHIVE_DIR', DEFAULT_ARCHIVE_DIR))
+    if not os.path.isabs(archive_dir):
+        archive_dir = os.path.join(get_project_root(), archive_dir)
+    return archive_dir
+
+
+def _board_archive_dir(board_id):
+    return os.path.join(_archive_dir(), f'board_{board_id}')
+
+
+def _month_dir(board_id, month):
+    return os.path.join(_board_archive_dir(board_id), month)
+
+
+def _list_segments(month_dir):
+    try:
+        names = os.listdir(month_dir)
+    except FileNotFoundError:
+        return []
+    return sorted(os.path.join(month_dir, name) for name in names if name.endswith(SEGMENT_SUFFIX))
+
+
+def _activity_to_dict(activity):
+    """Serialize an ActivityLog row for the archive."""
+    return {
+        'id': activity.id,
+        'action': activity.action,
+        'entity_type': activity.entity_type,
+        'entity_id': activity.entity_id,
+        'user_id': activity.user_id,
+        'board_id': activity.board_id,
+        'details': activity.details,
+        'created_at': activity.created_at.isoformat() if activity.created_at else None,
+    }
+
+
+def _write_segment(month_dir, records):
+    """Write records to a new segment file and return its path.
+
+    The segment is written to a temporary file, fsynced and renamed into
+    place, so readers only ever see complete files.
+    """
+    os.makedirs(month_dir, exist_ok=True)
+    first_id = min(record['id'] for record in records)
+    path = os.path.join(month_dir, f'{first_id:012d}-{uuid.uuid4().hex[:8]}{SEGMENT_SUFFIX}')
+
+    fd, tmp_path = tempfile.mkstemp(dir=month_dir, prefix='.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as raw:
+            with gzip.GzipFile(fileobj=raw, mode='wb') as archive:
+                for record in records:
+                    archive.write((json.dumps(record, default=str) + '\n').encode('utf-8'))
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+
+def _read_segment(path):
+    """Read one segment, or return None if it is corrupt."""
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as archive:
+            return [json.loads(line) for line in archive if line.strip()]
+    except FileNotFoundError:
+        # Merged away by a concurrent compaction
+        return []
+    except (OSError, EOFError, zlib.error, ValueError) as e:
+        print(f"⚠️  Skipping corrupt activity archive {path}: {e}")
+        return None
+
+
+def _write_archive(board_id, records):
+    """Write records to one new segment per month; returns the months touched."""
+    by_month = {}
+    for record in records:
+        by_month.setdefault(record['created_at'][:7], []).append(record)
+
+    for month, month_records in by_month.items():
+        _write_segment(_month_dir(board_id, month), month_records)
+    return set(by_month)
+
+
+def _read_archive_month(board_id, month):
+    """Read one month of archives, newest first, dropping duplicate rows."""
+    records = {}
+    for path in _list_segments(_month_dir(board_id, month)):
+        for record in _read_segment(path) or []:
+            records[record['id']] = record
+    return sorted(records.values(), key=lambda r: (r['created_at'], r['id']), reverse=True)
+
+
+def _compact_month(board_id, month):
+    """Merge a month's segments into one so it compresses as a single stream."""
+    month_dir = _month_dir(board_id, month)
+    readable = {}
+    for path in _list_segments(month_dir):
+        records = _read_segment(path)
+        # Corrupt segments are left in place for inspection
+        if records is not None:
+            readable[path] = records
+    if len(readable) < 2:
+        return
+
+    merged = {}
+    for records in readable.values():
+        for record in records:
+            merged[record['id']] = record
+
+    # Write the merged segment before removing the originals; a crash in
+    # between only leaves duplicates, which readers drop.
+    _write_segment(month_dir, sorted(merged.values(), key=lambda r: r['id']))
+    for path in readable:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _add_rollups(records):
+    """Fold a batch of archived records into the daily rollup table."""
+    counts = Counter()
+    for record in records:
+        day = datetime.fromisoformat(record['created_at']).date() if record['created_at'] else None
+        if day is not None:
+            counts[(record['board_id'], day, record['action'])] += 1
+
+    for (board_id, day, action), count in counts.items():
+        rollup = ActivityDailyRollup.query.filter_by(board_id=board_id, day=day, action=action).first()
+        if rollup:
+            rollup.count += count
+        else:
+            db.session.add(ActivityDailyRollup(board_id=board_id, day=day, action=action, count=count))
+
+
+def archive_old_activities(retention_days=None, batch_size=None):
+    """Archive ActivityLog rows older than the retention window.
+
+    Rows are processed in id-ordered batches, each committed on its own so
+    no transaction holds locks on the table for long. Every month touched
+    is compacted into a single segment at the end of the run. Returns the
+    number of rows archived.
+    """
+    from app.models import ActivityLog
+
+    retention_days = _retention_days() if retention_days is None else retention_days
+    batch_size = _batch_size() if batch_size is None else batch_size
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+
+    archived = 0
+    touched = set()
+    while True:
+        batch = (ActivityLog.query
+                 .filter(ActivityLog.created_at < cutoff)
+                 .order_by(ActivityLog.id)
+                 .limit(batch_size)
+                 .all())
+        if not batch:
+            break
+
+        ids = [activity.id for activity in batch]
+        by_board = {}
+        for activity in batch:
+            by_board.setdefault(activity.board_id, []).append(_activity_to_dict(activity))
+
+        # Write the archive before deleting; a crash in between leaves a
+        # duplicate in the archive (dropped on read), never a lost row.
+        for board_id, records in by_board.items():
+            touched.update((board_id, month) for month in _write_archive(board_id, records))
+
+        try:
+            deleted = ActivityLog.query.filter(ActivityLog.id.in_(ids)).delete(synchronize_session=False)
+            if deleted != len(ids):
+                # An overlapping run already archived some of these rows and
+                # counted them in its rollups; let that run finish the job.
+                db.session.rollback()
+                print("⚠️  Another activity archive run is in progress; stopping")
+                break
+            _add_rollups(record for records in by_board.values() for record in records)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        archived += len(ids)
+
+    for board_id, month in sorted(touched):
+        _compact_month(board_id, month)
+
+    return archived
+
+
+def read_archived_activities(board_id, offset=0, limit=20):
+    """Read a page of archived activities for a board, newest first.
+
+    Monthly archives are opened newest first and reading stops as soon as
+    the page is filled, so older months are never touched for recent pages.
+    """
+    board_dir = _board_archive_dir(board_id)
+    if not os.path.isdir(board_dir):
+        return []
+
+    months = sorted((name for name in os.listdir(board_dir)
+                     if os.path.isdir(os.path.join(board_dir, name))), reverse=True)
+
+    page = []
+    for month in months:
+        records = _read_archive_month(board_id, month)
+        if offset >= len(records):
+            offset -= len(records)
+            continue
+        page.extend(records[offset:offset + limit - len(page)])
+        offset = 0
+        if len(page) >= limit:
+            break
+    return page
+
+
+def get_board_activities(board_id, page=1, per_page=20):
+    """Return a page of board activities, falling back to the archive.
+
+    Live ActivityLog rows come first; once the requested page runs past
+    them the remainder is served from the board's archive.
+    """
+    from app.models import ActivityLog
+
+    offset = max(page - 1, 0) * per_page
+    query = ActivityLog.query.filter_by(board_id=board_id)
+    live_total = query.count()
+
+    activities = []
+    if offset < live_total:
+        live = (query.order_by(ActivityLog.created_at.desc(), ActivityLog.id.desc())
+                .offset(offset)
+                .limit(per_page)
+                .all())
+        activities = [_activity_to_dict(activity) for activity in live]
+
+    remaining = per_page - len(activities)
+    if remaining > 0:
+        archive_offset = max(offset - live_total, 0)
+        activities.extend(read_archived_activities(board_id, archive_offset, remaining))
+
+    return activities
+
+
+def get_board_activity_stats(board_id, days=30):
+    """Daily activity counts for a board, combining rollups and live rows."""
+    from app.models import ActivityLog
+
+    since = (datetime.utcnow() - timedelta(days=days)).date()
+    stats = Counter()
+
+    rollups = ActivityDailyRollup.query.filter(
+        ActivityDailyRollup.board_id == board_id,
+        ActivityDailyRollup.day >= since,
+    ).all()
+    for rollup in rollups:
+        stats[rollup.day.isoformat()] += rollup.count
+
+    day = func.date(ActivityLog.created_at)
+    live = (db.session.query(day, func.count(ActivityLog.id))
+            .filter(ActivityLog.board_id == board_id,
+                    ActivityLog.created_at >= datetime.combine(since, datetime.min.time()))
+            .group_by(day)
+            .all())
+    for live_day, count in live:
+        stats[str(live_day)] += count
+
+    return dict(sorted(stats.items()))
+
+
+# Helper function to register the CLI command
+def init_activity_retention(app):
+    """Initialize ActivityLog retention with the Flask app."""
+
+    @app.cli.command('archive-activities')
+    @click.option('--days', type=int, default=None, help='Retention window in days.')
+    @click.option('--batch-size', type=int, default=None, help='Rows archived per transaction.')
+    def archive_activities_command(days, batch_size):
+        """Archive ActivityLog rows older than the retention window."""
+        archived = archive_old_activities(retention_days=days, batch_size=batch_size)
+        print(f"Archived {archived} activity rows")
+
+
+if __name__ == '__main__':
+    import argparse
+    from app import create_app
+
+    parser = argparse.ArgumentParser(description='Archive ActivityLog rows older than the retention window.')
+    parser.add_argument('--days', type=int, default=None, help='Retention window in days.')
+    parser.add_argument('--batch-size', type=int, default=None, help='Rows archived per transaction.')
+    options = parser.parse_args()
+
+    with create_app().app_context():
+        archived = archive_old_activities(retention_days=options.days, batch_size=options.batch_size)
+    print(f"Archived {archived} activity rows")
@@ -3,6 +3,9 @@ import os
 from flask import Flask
 from app import create_app, db, socketio
 from swagger_ui import init_swagger_ui
+from activity_retention import init_activity_retention
+from request_validation import init_request_validation
+from background_jobs import init_background_jobs
 
 def create_demo_data():
     """Create demo data for testing"""
@@ -88,10 +91,20 @@ def create_demo_data():
 
 if __name__ == '__main__':
     app = create_app()
+    debug = True
     
     # Initialize Swagger UI
     init_swagger_ui(app)
     
+    # Compile request validators from the API spec (after all routes exist)
+    init_request_validation(app)
+    
+    # Register ActivityLog retention command
+    init_activity_retention(app)
+    
+    # Start background job workers for post-commit side effects
+    init_background_jobs(app, use_reloader=debug)
+    
     with app.app_context():
         # Create database tables
         db.create_all()
@@ -121,4 +134,4 @@ if __name__ == '__main__':
     print("="*50 + "\n")
     
     # Run the application with SocketIO
-    socketio.run(app, host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    socketio.run(app, host='0.0.0.0', port=5000, debug=debug)
\ No newline at end of file
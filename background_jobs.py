@@ -0,0 +1,395 @@
+"""
+Background Jobs for Mini Trello Flask App
+Runs post-commit side effects (Socket.IO emits, feed refreshes,
+notifications) on a worker thread pool so request handlers can return
+as soon as the database write is committed.
+"""
+
+import os
+import json
+import time
+import heapq
+import sqlite3
+import threading
+import itertools
+from collections import deque
+from contextlib import contextmanager
+
+from flask import jsonify
+from sqlalchemy import event
+
+from app import db, socketio
+
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_RETRY_BASE_DELAY = 1.0
+DEFAULT_LEASE_SECONDS = 300
+POLL_INTERVAL = 0.5
+
+
+class Job:
+    """A single unit of background work."""
+
+    def __init__(self, name, args=None, kwargs=None, attempts=0, run_at=None, enqueued_at=None, id=None):
+        self.id = id
+        self.name = name
+        self.args = list(args or [])
+        self.kwargs = dict(kwargs or {})
+        self.attempts = attempts
+        self.enqueued_at = enqueued_at or time.time()
+        self.run_at = run_at or self.enqueued_at
+
+
+class MemoryBackend:
+    """In-process queue; pending jobs are lost if the process exits."""
+
+    def __init__(self):
+        self._heap = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+
+    def put(self, job):
+        with self._condition:
+            if job.id is None:
+                job.id = next(self._counter)
+            heapq.heappush(self._heap, (job.run_at, next(self._counter), job))
+            self._condition.notify()
+
+    def get(self, timeout):
+        with self._condition:
+            if not self._heap or self._heap[0][0] > time.time():
+                wait = timeout
+                if self._heap:
+                    wait = min(timeout, max(self._heap[0][0] - time.time(), 0))
+                self._condition.wait(wait)
+            if self._heap and self._heap[0][0] <= time.time():
+                return heapq.heappop(self._heap)[2]
+            return None
+
+    def done(self, job):
+        pass
+
+    def retry(self, job, error):
+        self.put(job)
+
+    def fail(self, job, error):
+        pass
+
+    def depth(self):
+        with self._condition:
+            return len(self._heap)
+
+
+class SQLiteBackend:
+    """Durable queue stored in a SQLite file; survives restarts.
+
+    Several processes may share the file. A claimed job is leased for
+    ``lease_seconds``; if it is neither finished nor retried by then, its
+    worker is presumed dead and another worker may claim it again.
+    """
+
+    def __init__(self, path, lease_seconds=DEFAULT_LEASE_SECONDS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self._wakeup = threading.Event()
+        with self._connect() as conn:
+            # WAL is persistent in the database file, so it is set only once
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    run_at REAL NOT NULL,
+                    enqueued_at REAL NOT NULL,
+                    claimed_at REAL,
+                    error TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_status_run_at ON jobs (status, run_at)")
+
+    @contextmanager
+    def _connect(self):
+        """Open a connection for one transaction and always close it."""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def put(self, job):
+        payload = json.dumps({'args': job.args, 'kwargs': job.kwargs})
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO jobs (name, payload, attempts, run_at, enqueued_at) VALUES (?, ?, ?, ?, ?)",
+                (job.name, payload, job.attempts, job.run_at, job.enqueued_at)
+            )
+            job.id = cursor.lastrowid
+        self._wakeup.set()
+
+    def get(self, timeout):
+        now = time.time()
+        expired = now - self.lease_seconds
+        row = None
+        with self._connect() as conn:
+            candidates = conn.execute(
+                "SELECT id FROM jobs WHERE (status = 'queued' AND run_at <= ?) "
+                "OR (status = 'running' AND claimed_at < ?) ORDER BY run_at, id LIMIT 10",
+                (now, expired)
+            ).fetchall()
+            for (job_id,) in candidates:
+                # Re-checking the status in the UPDATE makes the claim atomic
+                # across processes; a rowcount of 0 means someone else won.
+                claimed = conn.execute(
+                    "UPDATE jobs SET status = 'running', claimed_at = ? WHERE id = ? "
+                    "AND (status = 'queued' OR (status = 'running' AND claimed_at < ?))",
+                    (now, job_id, expired)
+                ).rowcount
+                if claimed:
+                    row = conn.execute(
+                        "SELECT id, name, payload, attempts, run_at, enqueued_at FROM jobs WHERE id = ?",
+                        (job_id,)
+                    ).fetchone()
+                    break
+        if row is None:
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+            return None
+        job_id, name, payload, attempts, run_at, enqueued_at = row
+        payload = json.loads(payload)
+        return Job(name, payload['args'], payload['kwargs'], attempts, run_at, enqueued_at, id=job_id)
+
+    def done(self, job):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM jobs WHERE id = ?", (job.id,))
+
+    def retry(self, job, error):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', attempts = ?, run_at = ?, error = ? WHERE id = ?",
+                (job.attempts, job.run_at, error, job.id)
+            )
+        self._wakeup.set()
+
+    def fail(self, job, error):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', attempts = ?, error = ? WHERE id = ?",
+                (job.attempts, error, job.id)
+            )
+
+    def depth(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+
+
+class JobQueue:
+    """Registry of job handlers plus the worker pool that runs them."""
+
+    def __init__(self):
+        self.app = None
+        self.backend = MemoryBackend()
+        self.handlers = {}
+        self.max_retries = DEFAULT_MAX_RETRIES
+        self.retry_base_delay = DEFAULT_RETRY_BASE_DELAY
+        self._workers = []
+        self._stopping = threading.Event()
+        self._stats_lock = threading.Lock()
+        self._wait_times = deque(maxlen=1000)
+        self._run_times = deque(maxlen=1000)
+        self._counts = {'completed': 0, 'retried': 0, 'failed': 0}
+        self._warned_idle = False
+
+    def job(self, name):
+        """Register a function as a named job handler."""
+        def decorator(func):
+            self.handlers[name] = func
+            return func
+        return decorator
+
+    def _make_job(self, name, args, kwargs):
+        if name not in self.handlers:
+            raise ValueError(f"Unknown job: {name}")
+        # Round-trip through JSON so every backend sees the same payload and
+        # unserialisable arguments fail here rather than inside a worker
+        payload = json.loads(json.dumps({'args': args, 'kwargs': kwargs}))
+        return Job(name, payload['args'], payload['kwargs'])
+
+    def enqueue(self, name, *args, **kwargs):
+        """Queue a job to run as soon as a worker is free."""
+        job = self._make_job(name, args, kwargs)
+        self.backend.put(job)
+        self._warn_if_idle()
+        return job
+
+    def enqueue_after_commit(self, name, *args, **kwargs):
+        """Queue a job once the current database transaction commits.
+
+        Jobs are dropped if their transaction (or the savepoint they were
+        queued in) rolls back, so side effects never announce writes that
+        did not happen.
+        """
+        job = self._make_job(name, args, kwargs)
+        session = db.session()
+        transaction = session.get_nested_transaction() or session.get_transaction()
+        session.info.setdefault('pending_jobs', []).append((transaction, job))
+
+    def _flush_pending(self, session):
+        # Runs inside commit(): the write is already durable, so nothing
+        # may escape from here and turn it into an error response.
+        pending = session.info.pop('pending_jobs', [])
+        for transaction, job in pending:
+            job.enqueued_at = job.run_at = time.time()
+            try:
+                self.backend.put(job)
+            except Exception as e:
+                print(f"❌ Could not enqueue job {job.name}: {type(e).__name__}: {e}")
+        if pending:
+            self._warn_if_idle()
+
+    def _warn_if_idle(self):
+        if not self._workers and not self._warned_idle:
+            self._warned_idle = True
+            print("⚠️  Jobs are being queued but no workers are running in this process; "
+                  "call init_background_jobs(app) from create_app()")
+
+    def _discard_pending(self, session, previous_transaction):
+        pending = session.info.get('pending_jobs')
+        if not pending:
+            return
+        if not previous_transaction.nested:
+            session.info.pop('pending_jobs', None)
+            return
+
+        def queued_within(transaction):
+            while transaction is not None:
+                if transaction is previous_transaction:
+                    return True
+                transaction = transaction.parent
+            return False
+
+        # A savepoint rollback only drops the jobs queued inside it
+        session.info['pending_jobs'] = [(t, job) for t, job in pending if not queued_within(t)]
+
+    def start(self, workers):
+        self._stopping.clear()
+        for index in range(workers):
+            worker = threading.Thread(target=self._work, name=f'job-worker-{index}', daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        self._warned_idle = False
+
+    def stop(self, timeout=5):
+        self._stopping.set()
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
+
+    def _work(self):
+        while not self._stopping.is_set():
+            job = self.backend.get(POLL_INTERVAL)
+            if job is not None:
+                self._run(job)
+
+    def _run(self, job):
+        started = time.time()
+        try:
+            with self.app.app_context():
+                self.handlers[job.name](*job.args, **job.kwargs)
+        except Exception as e:
+            job.attempts += 1
+            error = f"{type(e).__name__}: {e}"
+            if job.attempts > self.max_retries:
+                self.backend.fail(job, error)
+                self._record('failed')
+                print(f"❌ Job {job.name} failed after {job.attempts} attempts: {error}")
+            else:
+                job.run_at = time.time() + self.retry_base_delay * (2 ** (job.attempts - 1))
+                self.backend.retry(job, error)
+                self._record('retried')
+            return
+
+        self.backend.done(job)
+        with self._stats_lock:
+            self._wait_times.append(started - job.enqueued_at)
+            self._run_times.append(time.time() - started)
+        self._record('completed')
+
+    def _record(self, outcome):
+        with self._stats_lock:
+            self._counts[outcome] += 1
+
+    def stats(self):
+        """Queue depth, outcome counts and recent latency percentiles (ms)."""
+        def percentiles(samples):
+            if not samples:
+                return {'p50': None, 'p95': None, 'max': None}
+            ordered = sorted(samples)
+            pick = lambda q: round(ordered[min(int(q * len(ordered)), len(ordered) - 1)] * 1000, 2)
+            return {'p50': pick(0.50), 'p95': pick(0.95), 'max': round(ordered[-1] * 1000, 2)}
+
+        with self._stats_lock:
+            counts = dict(self._counts)
+            wait_times = list(self._wait_times)
+            run_times = list(self._run_times)
+        return {
+            'queue_depth': self.backend.depth(),
+            'workers': len(self._workers),
+            'durable': isinstance(self.backend, SQLiteBackend),
+            **counts,
+            'wait_ms': percentiles(wait_times),
+            'run_ms': percentiles(run_times),
+        }
+
+
+job_queue = JobQueue()
+
+
+@job_queue.job('socketio_emit')
+def socketio_emit(event_name, data, room=None):
+    """Broadcast a Socket.IO event, e.g. card_created or activity refresh."""
+    socketio.emit(event_name, data, room=room)
+
+
+# Helper function to start the workers
+def init_background_jobs(app, use_reloader=None):
+    """Initialize the background job queue with the Flask app.
+
+    Call this from ``create_app()`` so every server (including
+    ``waitress-serve``) runs the workers. ``use_reloader`` must match the
+    server's reloader setting; it defaults to ``app.debug``.
+    """
+    workers = int(app.config.get('JOB_WORKERS', os.environ.get('JOB_WORKERS', DEFAULT_WORKERS)))
+    queue_path = app.config.get('JOB_QUEUE_PATH', os.environ.get('JOB_QUEUE_PATH'))
+
+    job_queue.app = app
+    job_queue.max_retries = int(app.config.get('JOB_MAX_RETRIES',
+                                               os.environ.get('JOB_MAX_RETRIES', DEFAULT_MAX_RETRIES)))
+    job_queue.retry_base_delay = float(app.config.get('JOB_RETRY_BASE_DELAY',
+                                                      os.environ.get('JOB_RETRY_BASE_DELAY', DEFAULT_RETRY_BASE_DELAY)))
+    lease_seconds = float(app.config.get('JOB_LEASE_SECONDS',
+                                         os.environ.get('JOB_LEASE_SECONDS', DEFAULT_LEASE_SECONDS)))
+
+    if not event.contains(db.session, 'after_commit', job_queue._flush_pending):
+        event.listen(db.session, 'after_commit', job_queue._flush_pending)
+        event.listen(db.session, 'after_soft_rollback', job_queue._discard_pending)
+
+    @app.route('/health/jobs')
+    def job_queue_stats():
+        """Report background job queue depth and latency."""
+        return jsonify(job_queue.stats())
+
+    if use_reloader is None:
+        use_reloader = app.debug
+
+    # Under the debug reloader only the child process serves requests
+    if use_reloader and os.environ.get('WERKZEUG_RUN_MAIN') != 'true':
+        return
+
+    if queue_path:
+        job_queue.backend = SQLiteBackend(queue_path, lease_seconds)
+    job_queue.start(workers)
+    print(f"⚙️  Background jobs: {workers} workers ({'durable: ' + queue_path if queue_path else 'in-memory'})")
@@ -0,0 +1,318 @@
+"""
+Request Validation for Mini Trello Flask App
+Compiles the OpenAPI request body schemas once at startup and checks
+incoming JSON payloads before they reach the route handlers.
+"""
+
+import os
+import re
+from urllib.parse import urlparse
+
+from flask import request, jsonify
+from werkzeug.exceptions import BadRequest, RequestEntityTooLarge
+
+from swagger_ui import load_api_spec
+
+DEFAULT_MAX_JSON_BYTES = 256 * 1024
+BODY_METHODS = {'POST', 'PUT', 'PATCH', 'DELETE'}
+
+_FLASK_PARAM = re.compile(r'<(?:[^:<>]+:)?[^<>]+>')
+_SPEC_PARAM = re.compile(r'\{[^}]+\}')
+
+_JSON_TYPES = {
+    'string': (str,),
+    'integer': (int,),
+    'number': (int, float),
+    'boolean': (bool,),
+    'array': (list,),
+    'object': (dict,),
+}
+
+
+class RequestValidationError(ValueError):
+    """Raised when a request body does not match its schema."""
+
+
+def _resolve_ref(spec, ref):
+    """Resolve a local '#/components/...' reference."""
+    node = spec
+    for part in ref.lstrip('#/').split('/'):
+        node = node[part]
+    return node
+
+
+def _type_check(type_name):
+    expected = _JSON_TYPES.get(type_name)
+    if expected is None:
+        return None
+    # bool is a subclass of int, so it must be rejected explicitly
+    reject_bool = type_name in ('integer', 'number')
+
+    if type_name == 'integer':
+        # JSON Schema treats 1.0 as an integer; json.loads decodes it as float
+        def check(value, path):
+            if isinstance(value, bool) or not (
+                    isinstance(value, int) or (isinstance(value, float) and value.is_integer())):
+                raise RequestValidationError(f"{path} must be of type {type_name}")
+        return check
+
+    def check(value, path):
+        if not isinstance(value, expected) or (reject_bool and isinstance(value, bool)):
+            raise RequestValidationError(f"{path} must be of type {type_name}")
+    return check
+
+
+def compile_schema(schema, spec=None, refs=None):
+    """Compile an OpenAPI schema into a validator callable.
+
+    The returned function takes ``(value, path)`` and raises
+    ``RequestValidationError`` on the first mismatch. All schema walking,
+    reference resolution and regex compilation happen here, once.
+    """
+    spec = spec or {}
+    refs = {} if refs is None else refs
+
+    if '$ref' in schema:
+        ref = schema['$ref']
+        if ref not in refs:
+            refs[ref] = None
+            refs[ref] = compile_schema(_resolve_ref(spec, ref), spec, refs)
+        if refs[ref] is None:
+            # Recursive reference that is still being compiled
+            return lambda value, path: refs[ref](value, path)
+        return refs[ref]
+
+    checks = []
+
+    type_check = _type_check(schema.get('type'))
+    if type_check:
+        checks.append(type_check)
+
+    if 'enum' in schema:
+        allowed = schema['enum']
+
+        def check_enum(value, path):
+            if value not in allowed:
+                raise RequestValidationError(f"{path} must be one of {allowed}")
+        checks.append(check_enum)
+
+    min_length = schema.get('minLength')
+    max_length = schema.get('maxLength')
+    pattern = re.compile(schema['pattern']) if 'pattern' in schema else None
+    if min_length is not None or max_length is not None or pattern:
+        def check_string(value, path):
+            if not isinstance(value, str):
+                return
+            if min_length is not None and len(value) < min_length:
+                raise RequestValidationError(f"{path} must be at least {min_length} characters")
+            if max_length is not None and len(value) > max_length:
+                raise RequestValidationError(f"{path} must be at most {max_length} characters")
+            if pattern and not pattern.search(value):
+                raise RequestValidationError(f"{path} has an invalid format")
+        checks.append(check_string)
+
+    minimum = schema.get('minimum')
+    maximum = schema.get('maximum')
+    if minimum is not None or maximum is not None:
+        def check_range(value, path):
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                return
+            if minimum is not None and value < minimum:
+                raise RequestValidationError(f"{path} must be >= {minimum}")
+            if maximum is not None and value > maximum:
+                raise RequestValidationError(f"{path} must be <= {maximum}")
+        checks.append(check_range)
+
+    if schema.get('type') == 'array' or 'items' in schema:
+        item_validator = compile_schema(schema['items'], spec, refs) if 'items' in schema else None
+        min_items = schema.get('minItems')
+        max_items = schema.get('maxItems')
+
+        def check_array(value, path):
+            if not isinstance(value, list):
+                return
+            if min_items is not None and len(value) < min_items:
+                raise RequestValidationError(f"{path} must contain at least {min_items} items")
+            if max_items is not None and len(value) > max_items:
+                raise RequestValidationError(f"{path} must contain at most {max_items} items")
+            if item_validator:
+                for index, item in enumerate(value):
+                    item_validator(item, f"{path}[{index}]")
+        checks.append(check_array)
+
+    if schema.get('type') == 'object' or 'properties' in schema or 'required' in schema:
+        properties = [(name, compile_schema(prop, spec, refs))
+                      for name, prop in schema.get('properties', {}).items()]
+        required = list(schema.get('required', []))
+        closed = schema.get('additionalProperties') is False
+        known = set(schema.get('properties', {}))
+
+        def check_object(value, path):
+            if not isinstance(value, dict):
+                return
+            for name in required:
+                if name not in value:
+                    raise RequestValidationError(f"{path}.{name} is required")
+            for name, validator in properties:
+                if name in value:
+                    validator(value[name], f"{path}.{name}")
+            if closed:
+                extra = set(value) - known
+                if extra:
+                    raise RequestValidationError(f"{path} has unexpected fields: {', '.join(sorted(extra))}")
+        checks.append(check_object)
+
+    if 'allOf' in schema:
+        checks.extend(compile_schema(sub, spec, refs) for sub in schema['allOf'])
+
+    # oneOf is checked with anyOf semantics; exclusivity is not worth the cost here
+    alternatives = schema.get('anyOf') or schema.get('oneOf')
+    if alternatives:
+        compiled_alternatives = [compile_schema(sub, spec, refs) for sub in alternatives]
+
+        def check_any(value, path):
+            for validator in compiled_alternatives:
+                try:
+                    validator(value, path)
+                    return
+                except RequestValidationError:
+                    continue
+            raise RequestValidationError(f"{path} does not match any allowed schema")
+        checks.append(check_any)
+
+    nullable = schema.get('nullable', False)
+
+    if len(checks) == 1 and not nullable:
+        return checks[0]
+
+    def validate(value, path):
+        if value is None and nullable:
+            return
+        for check in checks:
+            check(value, path)
+    return validate
+
+
+def _normalize_spec_path(path):
+    return _SPEC_PARAM.sub('{}', path)
+
+
+def _normalize_flask_rule(rule):
+    return _FLASK_PARAM.sub('{}', rule)
+
+
+def compile_spec_validators(spec, url_map, default_max_bytes=DEFAULT_MAX_JSON_BYTES):
+    """Compile request body validators for every spec operation with a Flask route.
+
+    Returns a dict keyed by ``(endpoint, METHOD)`` holding
+    ``(validator, body_required, max_bytes)`` tuples.
+    """
+    prefixes = ['']
+    for server in spec.get('servers') or []:
+        server_path = urlparse(server.get('url', '')).path.rstrip('/')
+        if server_path and server_path not in prefixes:
+            prefixes.append(server_path)
+
+    operations = {}
+    for path, path_item in (spec.get('paths') or {}).items():
+        if not isinstance(path_item, dict):
+            continue
+        for method, operation in path_item.items():
+            if method.upper() not in BODY_METHODS or not isinstance(operation, dict):
+                continue
+            for prefix in prefixes:
+                operations[(_normalize_spec_path(prefix + path), method.upper())] = operation
+
+    refs = {}
+    validators = {}
+    for rule in url_map.iter_rules():
+        normalized = _normalize_flask_rule(rule.rule)
+        for method in rule.methods & BODY_METHODS:
+            operation = operations.get((normalized, method))
+            if operation is None:
+                continue
+
+            request_body = operation.get('requestBody') or {}
+            if '$ref' in request_body:
+                request_body = _resolve_ref(spec, request_body['$ref'])
+            schema = (request_body.get('content', {})
+                      .get('application/json', {})
+                      .get('schema'))
+            if schema is None:
+                continue
+
+            validators[(rule.endpoint, method)] = (
+                compile_schema(schema, spec, refs),
+                bool(request_body.get('required', False)),
+                int(operation.get('x-max-body-bytes', default_max_bytes)),
+            )
+    return validators
+
+
+def init_request_validation(app, spec=None):
+    """Initialize spec-driven request validation with the Flask app.
+
+    Call this from ``create_app()`` after all blueprints are registered so
+    every route can be matched against the spec. The spec defaults to the one served
+    by the Swagger UI.
+    """
+    default_max_bytes = int(app.config.get('API_MAX_JSON_BYTES',
+                                           os.environ.get('API_MAX_JSON_BYTES', DEFAULT_MAX_JSON_BYTES)))
+
+    if spec is None:
+        with app.app_context():
+            spec = load_api_spec()
+    validators = compile_spec_validators(spec, app.url_map, default_max_bytes)
+    app.extensions['request_validation'] = validators
+
+    @app.before_request
+    def validate_request_body():
+        if request.method not in BODY_METHODS:
+            return None
+
+        entry = validators.get((request.endpoint, request.method))
+        if entry is None and not request.is_json:
+            return None
+        validator, body_required, max_bytes = entry or (None, False, default_max_bytes)
+
+        # Reject on the declared length before anything reads the body
+        if request.content_length is not None and request.content_length > max_bytes:
+            return jsonify({'error': f'Request body exceeds {max_bytes} bytes'}), 413
+
+        if request.content_length is None:
+            # Chunked bodies: read at most one byte past the limit to detect
+            # overflow. The body is cached, so get_json() will not re-read it.
+            request.max_content_length = max_bytes + 1
+            try:
+                body_length = len(request.get_data(cache=True))
+            except RequestEntityTooLarge:
+                body_length = max_bytes + 1
+            if body_length > max_bytes:
+                return jsonify({'error': f'Request body exceeds {max_bytes} bytes'}), 413
+        else:
+            body_length = request.content_length
+
+        if validator is None:
+            return None
+
+        if not body_length:
+            if body_required:
+                return jsonify({'error': 'Request body is required'}), 400
+            return None
+
+        if not request.is_json:
+            return jsonify({'error': 'Content-Type must be application/json'}), 415
+
+        # A non-silent get_json() caches the parsed body for the handler too
+        try:
+            data = request.get_json()
+        except BadRequest:
+            return jsonify({'error': 'Request body is not valid JSON'}), 400
+
+        try:
+            validator(data, 'body')
+        except RequestValidationError as e:
+            return jsonify({'error': str(e)}), 400
+        return None
+
+    print(f"🛡️  Request validation compiled for {len(validators)} endpoints")
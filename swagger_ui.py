@@ -10,19 +10,24 @@ from flask import Blueprint, render_template_string, jsonify, current_app
 swagger_bp = Blueprint('swagger', __name__, url_prefix='/api-docs')
 
 
+def get_project_root():
+    """Return the project root for the current Flask app."""
+    # The Flask app root_path might be in 'app' subdirectory, so we need to find project root
+    app_root = current_app.root_path
+    
+    # If we're in an 'app' subdirectory, go up one level
+    if os.path.basename(app_root) == 'app':
+        return os.path.dirname(app_root)
+    return app_root
+
+
 def load_api_spec():
     """Load the OpenAPI specification from YAML or JSON file."""
     import json
     
     # Try loading YAML first - find project root correctly
-    # The Flask app root_path might be in 'app' subdirectory, so we need to find project root
     app_root = current_app.root_path
-    
-    # If we're in an 'app' subdirectory, go up one level
-    if os.path.basename(app_root) == 'app':
-        project_root = os.path.dirname(app_root)
-    else:
-        project_root = app_root
+    project_root = get_project_root()
     
     yaml_path = os.path.join(project_root, 'docs', 'api-spec-corrected.yaml')
     json_path = os.path.join(project_root, 'docs', 'api-spec-simple.json')
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Test script for ActivityLog retention.
+Archives activities from an in-memory SQLite database into a temporary
+archive directory and reads them back through the activity feed helpers.
+"""
+
+import os
+import gzip
+import tempfile
+from datetime import datetime, timedelta
+from flask import Flask
+from app import db
+from app.models import ActivityLog
+import activity_retention
+from activity_retention import (
+    ActivityDailyRollup, archive_old_activities, read_archived_activities,
+    get_board_activities, get_board_activity_stats
+)
+
+
+def create_test_app(archive_dir=None, root_path=None):
+    """Create a minimal Flask app with an in-memory database"""
+    app = Flask(__name__, root_path=root_path)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['ACTIVITY_ARCHIVE_DIR'] = archive_dir or tempfile.mkdtemp()
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def add_activities(board_id, created_at, count, action='card_created'):
+    """Add activities one second apart and return their ids"""
+    activities = [
+        ActivityLog(
+            action=action,
+            entity_type='card',
+            entity_id=i,
+            user_id=1,
+            board_id=board_id,
+            details=f'Card {i}',
+            created_at=created_at + timedelta(seconds=i)
+        )
+        for i in range(count)
+    ]
+    db.session.add_all(activities)
+    db.session.commit()
+    return [activity.id for activity in activities]
+
+
+def month_segments(app, board_id, month):
+    """List the archive segment files for one board and month"""
+    month_dir = os.path.join(app.config['ACTIVITY_ARCHIVE_DIR'], f'board_{board_id}', month)
+    return sorted(os.path.join(month_dir, name) for name in os.listdir(month_dir))
+
+
+def test_batch_archiving():
+    """Test that old rows are archived in separately committed batches"""
+    app = create_test_app()
+    with app.app_context():
+        old_ids = add_activities(1, datetime(2020, 1, 15, 12), 5)
+        live_ids = add_activities(1, datetime.utcnow(), 2)
+
+        commits = []
+        original_commit = db.session.commit
+        db.session.commit = lambda: commits.append(1) or original_commit()
+        try:
+            archived = archive_old_activities(retention_days=90, batch_size=2)
+        finally:
+            del db.session.commit
+
+        assert archived == 5
+        assert len(commits) == 3, commits
+        assert sorted(a.id for a in ActivityLog.query.all()) == live_ids
+        assert [r['id'] for r in read_archived_activities(1, 0, 10)] == old_ids[::-1]
+    print("✅ Old activities archived in committed batches")
+
+
+def test_rollups_accumulate():
+    """Test that daily rollups add up across archive runs"""
+    app = create_test_app()
+    with app.app_context():
+        add_activities(1, datetime(2020, 1, 15, 9), 3)
+        archive_old_activities(retention_days=90)
+        add_activities(1, datetime(2020, 1, 15, 15), 2)
+        add_activities(1, datetime(2020, 1, 15, 16), 1, action='list_created')
+        archive_old_activities(retention_days=90)
+
+        rollups = {r.action: r.count for r in ActivityDailyRollup.query.filter_by(board_id=1).all()}
+        assert rollups == {'card_created': 5, 'list_created': 1}, rollups
+
+        stats = get_board_activity_stats(1, days=(datetime.utcnow() - datetime(2020, 1, 1)).days)
+        assert stats == {'2020-01-15': 6}, stats
+    print("✅ Daily rollups accumulate across archive runs")
+
+
+def test_crash_between_write_and_delete():
+    """Test that rows archived twice after a failed batch are read back once"""
+    app = create_test_app()
+    with app.app_context():
+        ids = add_activities(1, datetime(2020, 1, 15, 12), 3)
+
+        original_add_rollups = activity_retention._add_rollups
+
+        def failing_add_rollups(records):
+            raise RuntimeError('simulated crash')
+
+        activity_retention._add_rollups = failing_add_rollups
+        try:
+            archive_old_activities(retention_days=90)
+            raise AssertionError("Expected the simulated crash")
+        except RuntimeError:
+            pass
+        finally:
+            activity_retention._add_rollups = original_add_rollups
+
+        assert ActivityLog.query.count() == 3
+        assert len(month_segments(app, 1, '2020-01')) == 1
+        assert archive_old_activities(retention_days=90) == 3
+
+        # The retried batch and the leftover segment are compacted into one
+        segments = month_segments(app, 1, '2020-01')
+        assert len(segments) == 1, segments
+        with gzip.open(segments[0], 'rt', encoding='utf-8') as archive:
+            assert len(archive.readlines()) == 3
+
+        assert [r['id'] for r in read_archived_activities(1, 0, 10)] == ids[::-1]
+        assert ActivityDailyRollup.query.filter_by(board_id=1).one().count == 3
+    print("✅ Duplicate archive rows dropped on read after a failed batch")
+
+
+def test_live_to_archive_boundary():
+    """Test paging from live rows into monthly archives"""
+    app = create_test_app()
+    with app.app_context():
+        january = add_activities(2, datetime(2020, 1, 15, 12), 2)
+        february = add_activities(2, datetime(2020, 2, 15, 12), 3)
+        archive_old_activities(retention_days=90)
+        live = add_activities(2, datetime.utcnow() - timedelta(hours=1), 3)
+        add_activities(3, datetime.utcnow(), 2)
+
+        newest_first = live[::-1] + february[::-1] + january[::-1]
+        pages = [[a['id'] for a in get_board_activities(2, page=page, per_page=2)] for page in range(1, 6)]
+        assert pages == [newest_first[0:2], newest_first[2:4], newest_first[4:6], newest_first[6:8], []], pages
+
+        assert sorted(os.listdir(os.path.join(app.config['ACTIVITY_ARCHIVE_DIR'], 'board_2'))) == [
+            '2020-01', '2020-02'
+        ]
+    print("✅ Activity feed pages continue from live rows into the archive")
+
+
+def test_batches_compacted_per_month():
+    """Test that a run leaves one segment per board and month"""
+    app = create_test_app()
+    with app.app_context():
+        ids = add_activities(1, datetime(2020, 1, 15, 12), 7)
+        assert archive_old_activities(retention_days=90, batch_size=2) == 7
+
+        segments = month_segments(app, 1, '2020-01')
+        assert len(segments) == 1 and segments[0].endswith('.ndjson.gz'), segments
+        assert [r['id'] for r in read_archived_activities(1, 0, 10)] == ids[::-1]
+    print("✅ Archive batches compacted into one segment per month")
+
+
+def test_truncated_segment_skipped():
+    """Test that a truncated segment is skipped and later runs stay readable"""
+    app = create_test_app()
+    with app.app_context():
+        add_activities(1, datetime(2020, 1, 10, 12), 3)
+        archive_old_activities(retention_days=90)
+
+        segment = month_segments(app, 1, '2020-01')[0]
+        with open(segment, 'rb') as archive:
+            data = archive.read()
+        with open(segment, 'wb') as archive:
+            archive.write(data[:len(data) // 2])
+
+        later = add_activities(1, datetime(2020, 1, 20, 12), 2)
+        assert archive_old_activities(retention_days=90) == 2
+
+        # The corrupt segment is kept for inspection, never merged or deleted
+        assert segment in month_segments(app, 1, '2020-01')
+        assert [r['id'] for r in read_archived_activities(1, 0, 10)] == later[::-1]
+        assert [a['id'] for a in get_board_activities(1, page=1, per_page=10)] == later[::-1]
+    print("✅ Truncated archive segment skipped without breaking the month")
+
+
+def test_overlapping_runs():
+    """Test that a batch already archived by another run is not counted twice"""
+    app = create_test_app()
+    with app.app_context():
+        ids = add_activities(1, datetime(2020, 1, 15, 12), 3)
+
+        original_write_archive = activity_retention._write_archive
+
+        def racing_write_archive(board_id, records):
+            # Another run archives and deletes the same rows meanwhile
+            touched = original_write_archive(board_id, records)
+            ActivityLog.query.filter(ActivityLog.id.in_(ids)).delete(synchronize_session=False)
+            db.session.commit()
+            return touched
+
+        activity_retention._write_archive = racing_write_archive
+        try:
+            assert archive_old_activities(retention_days=90) == 0
+        finally:
+            activity_retention._write_archive = original_write_archive
+
+        assert ActivityDailyRollup.query.count() == 0
+        assert [r['id'] for r in read_archived_activities(1, 0, 10)] == ids[::-1]
+    print("✅ Overlapping archive runs do not double the rollups")
+
+
+def test_relative_archive_dir():
+    """Test that a relative archive dir resolves against the project root"""
+    project_root = tempfile.mkdtemp()
+    app = create_test_app(archive_dir=os.path.join('archive', 'activities'),
+                          root_path=os.path.join(project_root, 'app'))
+    with app.app_context():
+        add_activities(1, datetime(2020, 1, 15, 12), 1)
+        archive_old_activities(retention_days=90)
+    assert os.path.isdir(os.path.join(project_root, 'archive', 'activities', 'board_1', '2020-01'))
+    assert not os.path.exists(os.path.join(project_root, 'app', 'archive'))
+    print("✅ Relative archive dir resolves against the project root")
+
+
+if __name__ == '__main__':
+    test_batch_archiving()
+    test_rollups_accumulate()
+    test_crash_between_write_and_delete()
+    test_live_to_archive_boundary()
+    test_batches_compacted_per_month()
+    test_truncated_segment_skipped()
+    test_overlapping_runs()
+    test_relative_archive_dir()
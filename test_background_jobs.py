@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Test script for the background job queue.
+Runs jobs against a throwaway Flask-SQLAlchemy app and checks retries,
+post-commit delivery and the durable SQLite queue.
+"""
+
+import io
+import os
+import time
+import tempfile
+import threading
+from contextlib import redirect_stdout
+from datetime import datetime
+from flask import Flask
+from app import db
+from background_jobs import job_queue, init_background_jobs, JobQueue, Job, MemoryBackend, SQLiteBackend
+
+recorded = []
+
+
+@job_queue.job('record')
+def record(value):
+    recorded.append(value)
+
+
+class JobTestRow(db.Model):
+    __tablename__ = 'job_test_rows'
+    id = db.Column(db.Integer, primary_key=True)
+
+
+def create_test_app(use_reloader=None, **config):
+    """Create a minimal Flask app with an in-memory database and job workers"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['JOB_WORKERS'] = 2
+    app.config.update(config)
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    init_background_jobs(app, use_reloader=use_reloader)
+    recorded.clear()
+    return app
+
+
+def wait_for(condition, timeout=3):
+    """Poll until condition() is true or the timeout expires"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return condition()
+
+
+def test_commit_and_rollback():
+    """Test that jobs run after commit and are dropped on rollback"""
+    app = create_test_app()
+    try:
+        with app.app_context():
+            job_queue.enqueue_after_commit('record', 'rolled back')
+            db.session.add(JobTestRow())
+            db.session.rollback()
+
+            job_queue.enqueue_after_commit('record', 'committed')
+            time.sleep(0.2)
+            assert recorded == [], "Jobs must wait for the commit"
+
+            db.session.add(JobTestRow())
+            db.session.commit()
+        assert wait_for(lambda: recorded == ['committed']), recorded
+    finally:
+        job_queue.stop()
+    print("✅ Jobs run after commit and are dropped on rollback")
+
+
+def test_savepoint_rollback():
+    """Test that a savepoint rollback keeps the outer transaction's jobs"""
+    app = create_test_app()
+    try:
+        with app.app_context():
+            job_queue.enqueue_after_commit('record', 'outer')
+            savepoint = db.session.begin_nested()
+            job_queue.enqueue_after_commit('record', 'savepoint')
+            db.session.add(JobTestRow())
+            savepoint.rollback()
+            db.session.add(JobTestRow())
+            db.session.commit()
+            assert JobTestRow.query.count() == 1
+        assert wait_for(lambda: recorded == ['outer']), recorded
+        time.sleep(0.2)
+        assert recorded == ['outer'], recorded
+    finally:
+        job_queue.stop()
+    print("✅ Savepoint rollback drops only its own jobs")
+
+
+def test_bad_payload_fails_before_commit():
+    """Test that unserialisable payloads and enqueue errors never break commit()"""
+    app = create_test_app()
+    original_backend = job_queue.backend
+
+    class BrokenBackend(MemoryBackend):
+        def put(self, job):
+            if job.args == ['broken']:
+                raise RuntimeError('queue unavailable')
+            super().put(job)
+
+    try:
+        with app.app_context():
+            try:
+                job_queue.enqueue_after_commit('record', {'due': datetime.now()})
+                raise AssertionError("Expected TypeError for a datetime payload")
+            except TypeError:
+                pass
+
+            job_queue.backend = BrokenBackend()
+            job_queue.enqueue_after_commit('record', 'broken')
+            job_queue.enqueue_after_commit('record', 'delivered')
+            db.session.add(JobTestRow())
+            db.session.commit()
+
+            assert JobTestRow.query.count() == 1
+        assert wait_for(lambda: recorded == ['delivered']), recorded
+    finally:
+        job_queue.backend = original_backend
+        job_queue.stop()
+    print("✅ Bad payloads fail early and enqueue errors stay out of commit()")
+
+
+def test_retry_backoff():
+    """Test exponential backoff between retries and the final failure"""
+    app = Flask(__name__)
+    queue = JobQueue()
+    queue.app = app
+    queue.max_retries = 2
+    queue.retry_base_delay = 0.05
+    attempts = []
+
+    @queue.job('flaky')
+    def flaky():
+        attempts.append(time.time())
+        if len(attempts) < 3:
+            raise RuntimeError('try again')
+
+    @queue.job('broken')
+    def broken():
+        raise RuntimeError('always fails')
+
+    queue.start(1)
+    try:
+        queue.enqueue('flaky')
+        assert wait_for(lambda: queue.stats()['completed'] == 1), queue.stats()
+        assert attempts[1] - attempts[0] >= 0.05
+        assert attempts[2] - attempts[1] >= 0.10
+
+        queue.enqueue('broken')
+        assert wait_for(lambda: queue.stats()['failed'] == 1), queue.stats()
+        stats = queue.stats()
+        assert stats['retried'] == 4 and stats['queue_depth'] == 0, stats
+    finally:
+        queue.stop()
+    print("✅ Failed jobs retry with exponential backoff")
+
+
+def test_sqlite_claim_and_recovery():
+    """Test atomic claims across backends and lease-based recovery"""
+    path = os.path.join(tempfile.mkdtemp(), 'jobs.db')
+
+    first = SQLiteBackend(path)
+    first.put(Job('record', ['durable']))
+    claimed = first.get(0)
+    assert claimed.args == ['durable']
+
+    # A second process starting up must not steal a job that is still leased
+    assert SQLiteBackend(path).get(0) is None
+
+    # Once the lease runs out the job is recovered by another worker
+    time.sleep(0.05)
+    recovered = SQLiteBackend(path, lease_seconds=0.01).get(0)
+    assert recovered.id == claimed.id
+    first.done(recovered)
+    assert first.depth() == 0
+
+    for index in range(20):
+        first.put(Job('record', [index]))
+
+    claimed_ids = []
+    lock = threading.Lock()
+
+    def drain():
+        backend = SQLiteBackend(path)
+        while True:
+            job = backend.get(0)
+            if job is None:
+                return
+            with lock:
+                claimed_ids.append(job.id)
+
+    threads = [threading.Thread(target=drain) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(claimed_ids) == 20 and len(set(claimed_ids)) == 20, claimed_ids
+    print("✅ SQLite queue claims each job once and recovers expired leases")
+
+
+def test_health_endpoint():
+    """Test the /health/jobs monitoring endpoint"""
+    app = create_test_app()
+    try:
+        job_queue.enqueue('record', 'health')
+        assert wait_for(lambda: recorded == ['health']), recorded
+        with app.test_client() as client:
+            response = client.get('/health/jobs')
+            assert response.status_code == 200
+            stats = response.get_json()
+        assert stats['queue_depth'] == 0
+        assert stats['workers'] == 2
+        assert stats['completed'] >= 1
+        assert stats['wait_ms']['p50'] is not None and stats['run_ms']['max'] is not None
+    finally:
+        job_queue.stop()
+    print("✅ /health/jobs reports queue depth and latency")
+
+
+def test_reloader_parent_skips_workers():
+    """Test that the reloader's watcher process neither opens the queue nor starts workers"""
+    path = os.path.join(tempfile.mkdtemp(), 'jobs.db')
+    original_backend = job_queue.backend
+    run_main = os.environ.pop('WERKZEUG_RUN_MAIN', None)
+    try:
+        create_test_app(use_reloader=True, JOB_QUEUE_PATH=path)
+        assert job_queue.stats()['workers'] == 0
+        assert job_queue.backend is original_backend
+        assert not os.path.exists(path)
+
+        os.environ['WERKZEUG_RUN_MAIN'] = 'true'
+        create_test_app(use_reloader=True, JOB_QUEUE_PATH=path)
+        assert job_queue.stats()['workers'] == 2
+        assert isinstance(job_queue.backend, SQLiteBackend)
+    finally:
+        os.environ.pop('WERKZEUG_RUN_MAIN', None)
+        if run_main is not None:
+            os.environ['WERKZEUG_RUN_MAIN'] = run_main
+        job_queue.stop()
+        job_queue.backend = original_backend
+    print("✅ Reloader parent process does not start workers")
+
+
+def test_idle_queue_warning():
+    """Test that queueing without workers warns once"""
+    queue = JobQueue()
+    queue.job('noop')(lambda: None)
+
+    output = io.StringIO()
+    with redirect_stdout(output):
+        queue.enqueue('noop')
+        queue.enqueue('noop')
+    assert output.getvalue().count('no workers are running') == 1, output.getvalue()
+    assert queue.stats()['queue_depth'] == 2
+    print("✅ Queueing without workers logs a warning")
+
+
+if __name__ == '__main__':
+    test_commit_and_rollback()
+    test_savepoint_rollback()
+    test_bad_payload_fails_before_commit()
+    test_retry_backoff()
+    test_sqlite_claim_and_recovery()
+    test_health_endpoint()
+    test_reloader_parent_skips_workers()
+    test_idle_queue_warning()
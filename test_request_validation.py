@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Test script for spec-driven request validation.
+Checks the compiled validators against a small inline spec and
+benchmarks the per-request validation overhead.
+"""
+
+import io
+import json
+import timeit
+from flask import Flask, request, jsonify
+from request_validation import init_request_validation, compile_schema, RequestValidationError
+
+SPEC = {
+    "openapi": "3.0.0",
+    "info": {"title": "Mini Trello API", "version": "1.0.0"},
+    "paths": {
+        "/api/boards/{board_id}/cards": {
+            "post": {
+                "requestBody": {
+                    "required": True,
+                    "content": {
+                        "application/json": {
+                            "schema": {"$ref": "#/components/schemas/CardCreate"}
+                        }
+                    }
+                }
+            }
+        }
+    },
+    "components": {
+        "schemas": {
+            "CardCreate": {
+                "type": "object",
+                "required": ["title", "list_id"],
+                "properties": {
+                    "title": {"type": "string", "minLength": 1, "maxLength": 200},
+                    "description": {"type": "string", "nullable": True},
+                    "list_id": {"type": "integer", "minimum": 1},
+                    "position": {"type": "number"},
+                    "labels": {"type": "array", "items": {"type": "string"}, "maxItems": 10},
+                    "due_date": {"type": "string", "nullable": True}
+                }
+            }
+        }
+    }
+}
+
+VALID_CARD = {
+    "title": "Implement user authentication",
+    "description": "Session and JWT login",
+    "list_id": 3,
+    "position": 1.0,
+    "labels": ["backend", "auth"],
+    "due_date": None
+}
+
+
+def create_test_app(max_bytes=1024, validate=True):
+    """Create a minimal Flask app with one card endpoint"""
+    app = Flask(__name__)
+    app.config['API_MAX_JSON_BYTES'] = max_bytes
+
+    @app.route('/api/boards/<int:board_id>/cards', methods=['POST'])
+    def create_card(board_id):
+        return jsonify(request.get_json()), 201
+
+    if validate:
+        init_request_validation(app, spec=SPEC)
+    return app
+
+
+def test_compiled_schema():
+    """Test the compiled validator directly"""
+    validator = compile_schema(SPEC['components']['schemas']['CardCreate'], SPEC)
+    validator(VALID_CARD, 'body')
+    validator({"title": "x", "list_id": 1.0}, 'body')
+
+    for bad, reason in [
+        ({"list_id": 3}, "missing title"),
+        ({"title": "", "list_id": 3}, "empty title"),
+        ({"title": "x", "list_id": True}, "boolean list_id"),
+        ({"title": "x", "list_id": 0}, "list_id below minimum"),
+        ({"title": "x", "list_id": 1.5}, "fractional list_id"),
+        ({"title": "x", "list_id": 3, "labels": [1]}, "non-string label"),
+    ]:
+        try:
+            validator(bad, 'body')
+        except RequestValidationError:
+            continue
+        raise AssertionError(f"Expected failure for {reason}")
+    print("✅ Compiled schema accepts valid cards and rejects invalid ones")
+
+
+def test_endpoint_validation():
+    """Test validation through the Flask request cycle"""
+    app = create_test_app()
+    with app.test_client() as client:
+        response = client.post('/api/boards/1/cards', json=VALID_CARD)
+        assert response.status_code == 201, response.get_data(as_text=True)
+
+        response = client.post('/api/boards/1/cards', json={"title": "x"})
+        assert response.status_code == 400
+        assert 'list_id' in response.get_json()['error']
+
+        response = client.post('/api/boards/1/cards', data='{not json', content_type='application/json')
+        assert response.status_code == 400
+
+        response = client.post('/api/boards/1/cards', json={"title": "x" * 2000, "list_id": 1})
+        assert response.status_code == 413
+
+        response = client.post('/api/boards/1/cards', data='title=x')
+        assert response.status_code == 415
+
+        # Chunked bodies have no Content-Length and are capped while reading
+        def post_chunked(payload, content_type='application/json'):
+            body = payload.encode() if isinstance(payload, str) else json.dumps(payload).encode()
+            return client.post(
+                '/api/boards/1/cards',
+                input_stream=io.BytesIO(body),
+                content_type=content_type,
+                headers={'Transfer-Encoding': 'chunked'},
+                environ_overrides={'wsgi.input_terminated': True}
+            )
+
+        response = post_chunked({"title": "x" * 5000, "list_id": 1})
+        assert response.status_code == 413, response.get_data(as_text=True)
+
+        response = post_chunked(VALID_CARD)
+        assert response.status_code == 201, response.get_data(as_text=True)
+        assert response.get_json() == VALID_CARD
+
+        response = post_chunked('title=x', content_type='text/plain')
+        assert response.status_code == 415, response.get_data(as_text=True)
+
+        response = post_chunked('')
+        assert response.status_code == 400
+        assert response.get_json()['error'] == 'Request body is required'
+    print("✅ Endpoint rejects invalid, malformed and oversized payloads")
+
+
+def benchmark_validation(iterations=20000):
+    """Benchmark per-request validation overhead"""
+    validator = compile_schema(SPEC['components']['schemas']['CardCreate'], SPEC)
+    seconds = timeit.timeit(lambda: validator(VALID_CARD, 'body'), number=iterations)
+    print(f"Compiled validator:   {seconds / iterations * 1e6:8.2f} µs per call")
+
+    body = json.dumps(VALID_CARD)
+    for label, validate in [("Request without validation", False), ("Request with validation", True)]:
+        app = create_test_app(validate=validate)
+        with app.test_client() as client:
+            post = lambda: client.post('/api/boards/1/cards', data=body, content_type='application/json')
+            post()
+            seconds = timeit.timeit(post, number=iterations // 10)
+        print(f"{label}: {seconds / (iterations // 10) * 1e6:8.2f} µs per request")
+
+
+if __name__ == '__main__':
+    test_compiled_schema()
+    test_endpoint_validation()
+    print("\n⏱️  Validation benchmark")
+    benchmark_validation()